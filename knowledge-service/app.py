@@ -1,45 +1,144 @@
 """Knowledge Base Service API - Standalone microservice for RAG functionality."""
 
 from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-from typing import Optional, Dict, Any, List
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Optional, Dict, Any, Iterable, Iterator, List, Set, Tuple
 import sqlite3
-import json
-from datetime import datetime
+import difflib
+import hashlib
+import orjson
+from cachetools import LRUCache, TTLCache
+from rapidfuzz import fuzz
 from pathlib import Path
 import os
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 
 try:
-    import chromadb
-    from chromadb.config import Settings
-    CHROMADB_AVAILABLE = True
-except (ImportError, RuntimeError) as e:
-    print(f"ChromaDB not available: {e}")
-    CHROMADB_AVAILABLE = False
+    import faiss
+    import numpy as np
+    FAISS_AVAILABLE = True
+except ImportError as e:
+    print(f"FAISS not available: {e}")
+    FAISS_AVAILABLE = False
 
-app = FastAPI(title="Knowledge Base Service", version="1.0.0")
+try:
+    from sentence_transformers import SentenceTransformer
+    EMBEDDINGS_AVAILABLE = True
+except ImportError as e:
+    print(f"sentence-transformers not available: {e}")
+    EMBEDDINGS_AVAILABLE = False
+
+app = FastAPI(
+    title="Knowledge Base Service",
+    version="1.0.0",
+    default_response_class=ORJSONResponse
+)
+
+# Entry lists and search results are large, highly compressible JSON
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
 
 # Data models
+# Upper bound for text fields; generous enough for hour-long transcripts
+MAX_TEXT_LENGTH = 1_000_000
+
 class EntryCreate(BaseModel):
+    model_config = ConfigDict(extra="forbid", str_max_length=MAX_TEXT_LENGTH)
+    
     original_text: str
     processed_text: str
     format_type: str
     metadata: Optional[Dict[str, Any]] = None
 
+# Bounds how long one batch holds the SQLite write lock
+MAX_BATCH_ENTRIES = 1000
+
+class BatchEntryCreate(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+    
+    entries: List[EntryCreate] = Field(max_length=MAX_BATCH_ENTRIES)
+
 class EntryUpdate(BaseModel):
+    model_config = ConfigDict(extra="forbid", str_max_length=MAX_TEXT_LENGTH)
+    
     edited_text: str
 
 class SearchQuery(BaseModel):
+    model_config = ConfigDict(extra="forbid", str_max_length=MAX_TEXT_LENGTH)
+    
     query: str
     limit: int = 10
 
+class BatchSearchQuery(BaseModel):
+    model_config = ConfigDict(extra="forbid", str_max_length=MAX_TEXT_LENGTH)
+    
+    queries: List[str]
+    limit: int = 10
+
+class CorrectionsQuery(BaseModel):
+    model_config = ConfigDict(extra="forbid", str_max_length=MAX_TEXT_LENGTH)
+    
+    text: str
+
 # Global knowledge base instance
 kb = None
 
+# Worker threads for blocking SQLite/FAISS calls (one pooled connection each)
+DB_WORKERS = 8
+
+# Vector writes are batched off the request path
+VECTOR_BATCH_SIZE = 128
+VECTOR_FLUSH_INTERVAL = 0.2  # seconds
+VECTOR_PERSIST_INTERVAL = 30  # seconds between index snapshots to disk
+
+# HNSW graph parameters, favouring recall for the small correction KB
+HNSW_M = 32
+HNSW_EF_CONSTRUCTION = 200
+HNSW_EF_SEARCH = 64
+
+SEARCH_CACHE_SIZE = 1024
+SEARCH_CACHE_TTL = 60  # seconds
+QUERY_EMBEDDING_CACHE_SIZE = 4096
+
+# Columns returned for an entry; excludes generated index-only columns like meta_filename
+ENTRY_COLUMNS = ("id", "timestamp", "original_text", "processed_text", "format_type", "metadata", "edited_text")
+ENTRY_SELECT = ", ".join(ENTRY_COLUMNS)
+ENTRY_SELECT_E = ", ".join(f"e.{column}" for column in ENTRY_COLUMNS)
+
+DATA_DIR = Path(os.environ.get("KB_DATA_DIR", "/app/data"))
+
+EMBEDDING_MODEL = os.environ.get("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+
 class KnowledgeBaseService:
     def __init__(self):
-        self.db_path = Path("/app/data/knowledge.db")
-        self.vector_db_path = Path("/app/data/vectors")
+        self.db_path = DATA_DIR / "knowledge.db"
+        self.vector_db_path = DATA_DIR / "vectors"
+        self.index_path = self.vector_db_path / "entries.faiss"
+        
+        # One SQLite connection per worker thread, reused across requests
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        
+        # In-memory top corrections per original word, kept in sync on write
+        self._corrections_cache: Dict[str, List[tuple]] = {}
+        self._corrections_lock = threading.RLock()
+        
+        # Recent search results keyed by (query, limit)
+        self._search_cache: TTLCache = TTLCache(maxsize=SEARCH_CACHE_SIZE, ttl=SEARCH_CACHE_TTL)
+        self._search_cache_lock = threading.Lock()
+        # Bumped on every invalidation; results computed across a bump are not cached
+        self._search_generation = 0
+        
+        # Query embeddings keyed by SHA-256 of the query; unlike results they survive writes
+        self._query_embedding_cache: LRUCache = LRUCache(maxsize=QUERY_EMBEDDING_CACHE_SIZE)
+        self._query_embedding_lock = threading.Lock()
         
         # Ensure directories exist
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
@@ -48,12 +147,107 @@ class KnowledgeBaseService:
         # Initialize databases
         self._init_sqlite()
         self._init_vector_db()
+        self._load_corrections_cache()
+        
+        # Background writer that batches vector index inserts
+        self._vector_queue: queue.Queue = queue.Queue()
+        self._vector_writer: Optional[threading.Thread] = None
+        if self.index is not None:
+            self._vector_writer = threading.Thread(
+                target=self._vector_flusher, name="vector-writer", daemon=True
+            )
+            self._vector_writer.start()
+    
+    def _conn(self) -> sqlite3.Connection:
+        """Return the pooled SQLite connection for the current thread."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(
+                self.db_path,
+                check_same_thread=False,
+                cached_statements=256
+            )
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA temp_store=MEMORY")
+            conn.execute("PRAGMA mmap_size=268435456")
+            conn.execute("PRAGMA cache_size=-65536")
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+    
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Group writes on this thread's connection into one transaction; nests via savepoints."""
+        conn = self._conn()
+        depth = getattr(self._local, "tx_depth", 0)
+        if depth == 0:
+            self._local.after_commit = []
+            conn.execute("BEGIN IMMEDIATE")
+        else:
+            conn.execute(f"SAVEPOINT tx_{depth}")
+        after_commit = self._local.after_commit
+        pending = len(after_commit)
+        
+        self._local.tx_depth = depth + 1
+        try:
+            yield conn
+        except BaseException:
+            # Side effects registered inside the failed block must never run
+            del after_commit[pending:]
+            if depth == 0:
+                conn.rollback()
+            else:
+                conn.execute(f"ROLLBACK TO tx_{depth}")
+                conn.execute(f"RELEASE tx_{depth}")
+            raise
+        finally:
+            self._local.tx_depth = depth
+        
+        if depth > 0:
+            conn.execute(f"RELEASE tx_{depth}")
+            return
+        self._local.after_commit = []
+        try:
+            conn.commit()
+        except BaseException:
+            # Don't leave the pooled connection inside an open transaction
+            conn.rollback()
+            raise
+        for callback in after_commit:
+            callback()
+    
+    def _after_commit(self, callback) -> None:
+        """Run callback once the outermost transaction commits (now if none is open)."""
+        if getattr(self._local, "tx_depth", 0):
+            self._local.after_commit.append(callback)
+        else:
+            callback()
+    
+    def close(self) -> None:
+        """Flush pending vector writes and close all pooled SQLite connections."""
+        if self._vector_writer is not None:
+            self._vector_queue.put(None)
+            self._vector_writer.join()
+            self._vector_writer = None
+            self._persist_index()
+        
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
     
     def _init_sqlite(self) -> None:
         """Initialize SQLite database for structured storage."""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._conn()
         cursor = conn.cursor()
         
+        # WAL lets readers proceed during writes and is persisted in the db file
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA wal_autocheckpoint=1000")
+        
         # Create entries table
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS entries (
@@ -98,187 +292,429 @@ class KnowledgeBaseService:
         """)
         
         # Create indexes
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_corrections_original ON corrections(original_word)")
+        # Covers the suggestion lookup so it never touches the table rows
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_corrections_covering ON corrections(
+                original_word, usage_count DESC, last_used DESC, corrected_word, correction_type
+            )
+        """)
+        cursor.execute("DROP INDEX IF EXISTS idx_corrections_original")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_corrections_corrected ON corrections(corrected_word)")
+        self._init_corrections_unique(cursor)
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_terminology_term ON terminology(term)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_timestamp ON entries(timestamp)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_format_type ON entries(format_type)")
+        self._init_metadata_columns(cursor)
         
         conn.commit()
-        conn.close()
+        
+        self._init_fts(conn)
+    
+    def _init_metadata_columns(self, cursor: sqlite3.Cursor) -> None:
+        """Expose frequently filtered metadata keys as indexed generated columns."""
+        cursor.execute("PRAGMA table_xinfo(entries)")
+        columns = {row[1] for row in cursor.fetchall()}
+        if "meta_filename" not in columns:
+            cursor.execute("""
+                ALTER TABLE entries ADD COLUMN meta_filename TEXT
+                GENERATED ALWAYS AS (json_extract(metadata, '$.filename')) VIRTUAL
+            """)
+        # Serves the filename filter and its ORDER BY timestamp without a sort step
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_meta_filename_ts ON entries(meta_filename, timestamp DESC)
+        """)
+        cursor.execute("DROP INDEX IF EXISTS idx_meta_filename")
+    
+    def _init_corrections_unique(self, cursor: sqlite3.Cursor) -> None:
+        """Make (original_word, corrected_word) unique so corrections can be upserted."""
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'idx_corrections_pair'")
+        if cursor.fetchone() is None:
+            # Merge duplicate pairs left by older versions into their first row
+            cursor.execute("""
+                UPDATE corrections SET usage_count = (
+                    SELECT SUM(c.usage_count) FROM corrections c
+                    WHERE c.original_word = corrections.original_word
+                      AND c.corrected_word = corrections.corrected_word
+                )
+                WHERE id IN (
+                    SELECT MIN(id) FROM corrections
+                    GROUP BY original_word, corrected_word
+                    HAVING COUNT(*) > 1
+                )
+            """)
+            cursor.execute("""
+                DELETE FROM corrections WHERE id NOT IN (
+                    SELECT MIN(id) FROM corrections
+                    GROUP BY original_word, corrected_word
+                )
+            """)
+        cursor.execute("""
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_corrections_pair
+            ON corrections(original_word, corrected_word)
+        """)
+    
+    def _init_fts(self, conn: sqlite3.Connection) -> None:
+        """Create the FTS5 index over entries and keep it in sync via triggers."""
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'entries_fts'")
+            exists = cursor.fetchone() is not None
+            
+            cursor.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS entries_fts USING fts5(
+                    original_text,
+                    processed_text,
+                    content='entries',
+                    content_rowid='id',
+                    tokenize='unicode61 remove_diacritics 2'
+                )
+            """)
+            cursor.execute("""
+                CREATE TRIGGER IF NOT EXISTS entries_fts_ai AFTER INSERT ON entries BEGIN
+                    INSERT INTO entries_fts(rowid, original_text, processed_text)
+                    VALUES (new.id, new.original_text, new.processed_text);
+                END
+            """)
+            cursor.execute("""
+                CREATE TRIGGER IF NOT EXISTS entries_fts_ad AFTER DELETE ON entries BEGIN
+                    INSERT INTO entries_fts(entries_fts, rowid, original_text, processed_text)
+                    VALUES ('delete', old.id, old.original_text, old.processed_text);
+                END
+            """)
+            cursor.execute("""
+                CREATE TRIGGER IF NOT EXISTS entries_fts_au
+                AFTER UPDATE OF original_text, processed_text ON entries BEGIN
+                    INSERT INTO entries_fts(entries_fts, rowid, original_text, processed_text)
+                    VALUES ('delete', old.id, old.original_text, old.processed_text);
+                    INSERT INTO entries_fts(rowid, original_text, processed_text)
+                    VALUES (new.id, new.original_text, new.processed_text);
+                END
+            """)
+            
+            # Index rows that were stored before full-text search existed
+            if not exists:
+                cursor.execute("INSERT INTO entries_fts(entries_fts) VALUES ('rebuild')")
+            
+            conn.commit()
+            self.fts_enabled = True
+        except sqlite3.OperationalError as e:
+            conn.rollback()
+            print(f"Warning: FTS5 not available, using LIKE search: {e}")
+            self.fts_enabled = False
     
     def _init_vector_db(self) -> None:
-        """Initialize ChromaDB for semantic search."""
-        if not CHROMADB_AVAILABLE:
-            print("ChromaDB not available - vector search disabled")
-            self.chroma_client = None
-            self.collection = None
+        """Initialize the FAISS HNSW index for semantic search."""
+        self.embedder = None
+        self.index = None
+        self._index_lock = threading.Lock()
+        self._index_persisted_at = time.monotonic()
+        if not (FAISS_AVAILABLE and EMBEDDINGS_AVAILABLE):
+            print("FAISS or sentence-transformers not available - vector search disabled")
             return
-            
+        
         try:
-            self.chroma_client = chromadb.PersistentClient(
-                path=str(self.vector_db_path),
-                settings=Settings(anonymized_telemetry=False)
-            )
+            self.embedder = SentenceTransformer(EMBEDDING_MODEL)
+            if self.embedder.device.type == "cuda":
+                self.embedder.half()
+            print(f"Embedding model '{EMBEDDING_MODEL}' loaded on {self.embedder.device}")
             
-            self.collection = self.chroma_client.get_or_create_collection(
-                name="stt_knowledge",
-                metadata={"description": "STT AI Agent Knowledge Base"}
-            )
-            print("ChromaDB initialized successfully")
+            if self.index_path.exists():
+                self.index = faiss.read_index(str(self.index_path))
+            else:
+                # Entry IDs are used directly as vector IDs; vectors are stored as fp16
+                hnsw = faiss.IndexHNSWSQ(
+                    self.embedder.get_sentence_embedding_dimension(),
+                    faiss.ScalarQuantizer.QT_fp16,
+                    HNSW_M,
+                    faiss.METRIC_INNER_PRODUCT
+                )
+                hnsw.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+                self.index = faiss.IndexIDMap(hnsw)
+            faiss.downcast_index(self.index.index).hnsw.efSearch = HNSW_EF_SEARCH
+            
+            self._backfill_index()
+            print(f"FAISS index initialized with {self.index.ntotal} vectors")
+        except Exception as e:
+            print(f"Warning: Vector index initialization failed: {e}")
+            self.embedder = None
+            self.index = None
+    
+    def _backfill_index(self) -> None:
+        """Embed entries that are missing from the index (new index or unsaved tail)."""
+        indexed_ids = faiss.vector_to_array(self.index.id_map)
+        last_indexed_id = int(indexed_ids.max()) if len(indexed_ids) else 0
+        
+        cursor = self._conn().cursor()
+        cursor.execute(
+            "SELECT id, processed_text FROM entries WHERE id > ? ORDER BY id",
+            (last_indexed_id,)
+        )
+        rows = cursor.fetchall()
+        for start in range(0, len(rows), VECTOR_BATCH_SIZE):
+            self._add_vectors([tuple(row) for row in rows[start:start + VECTOR_BATCH_SIZE]])
+        if rows:
+            self._persist_index()
+    
+    def _persist_index(self) -> None:
+        """Write the FAISS index to disk atomically."""
+        if self.index is None:
+            return
+        tmp_path = self.index_path.with_suffix(".tmp")
+        try:
+            with self._index_lock:
+                faiss.write_index(self.index, str(tmp_path))
+            os.replace(tmp_path, self.index_path)
+            self._index_persisted_at = time.monotonic()
         except Exception as e:
-            print(f"Warning: Vector database initialization failed: {e}")
-            self.chroma_client = None
-            self.collection = None
+            print(f"Warning: Failed to persist vector index: {e}")
     
     def save_entry(self, entry: EntryCreate) -> int:
         """Save a new entry to the knowledge base."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        metadata_json = json.dumps(entry.metadata) if entry.metadata else None
+        return self.save_entries([entry])[0]
+    
+    def save_entries(self, entries: List[EntryCreate]) -> List[int]:
+        """Save several entries in a single transaction and return their IDs."""
+        if not entries:
+            return []
         
-        cursor.execute("""
-            INSERT INTO entries (original_text, processed_text, format_type, metadata)
-            VALUES (?, ?, ?, ?)
-        """, (entry.original_text, entry.processed_text, entry.format_type, metadata_json))
+        rows = [
+            (
+                entry.original_text,
+                entry.processed_text,
+                entry.format_type,
+                orjson.dumps(entry.metadata).decode() if entry.metadata else None
+            )
+            for entry in entries
+        ]
+        with self.transaction() as conn:
+            cursor = conn.cursor()
+            cursor.executemany("""
+                INSERT INTO entries (original_text, processed_text, format_type, metadata)
+                VALUES (?, ?, ?, ?)
+            """, rows)
+            
+            # AUTOINCREMENT under the write lock hands out consecutive IDs
+            # (executemany discards RETURNING rows, so derive them from the last one)
+            last_id = cursor.execute("SELECT last_insert_rowid()").fetchone()[0]
+            entry_ids = list(range(last_id - len(rows) + 1, last_id + 1))
+            
+            # Rows of a rolled-back batch must not reach the caches or the vector index
+            self._after_commit(lambda: self._entries_saved(entry_ids, entries))
         
-        entry_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        return entry_ids
+    
+    def _entries_saved(self, entry_ids: List[int], entries: List[EntryCreate]) -> None:
+        """Invalidate cached searches and queue committed entries for the vector index."""
+        self._invalidate_search_cache()
+        if self._vector_writer is not None:
+            for entry_id, entry in zip(entry_ids, entries):
+                self._vector_queue.put((entry_id, entry.processed_text))
+    
+    def _vector_flusher(self) -> None:
+        """Drain queued entries and add them to the vector index in batches."""
+        running = True
+        while running:
+            item = self._vector_queue.get()
+            if item is None:
+                break
+            
+            batch = [item]
+            deadline = time.monotonic() + VECTOR_FLUSH_INTERVAL
+            while len(batch) < VECTOR_BATCH_SIZE:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._vector_queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if item is None:
+                    running = False
+                    break
+                batch.append(item)
+            
+            self._add_vectors(batch)
+            # Results cached between the SQLite commit and now don't include the batch
+            self._invalidate_search_cache()
+            if time.monotonic() - self._index_persisted_at > VECTOR_PERSIST_INTERVAL:
+                self._persist_index()
+    
+    def _embed(self, texts: List[str]) -> "np.ndarray":
+        """Encode texts with the preloaded embedding model."""
+        embeddings = self.embedder.encode(
+            texts,
+            batch_size=64,
+            normalize_embeddings=True,
+            convert_to_numpy=True
+        )
+        return np.ascontiguousarray(embeddings, dtype=np.float32)
+    
+    def _embed_queries(self, queries: List[str]) -> "np.ndarray":
+        """Encode search queries, reusing embeddings of queries seen before."""
+        keys = [hashlib.sha256(query.encode("utf-8")).digest() for query in queries]
+        with self._query_embedding_lock:
+            vectors = [self._query_embedding_cache.get(key) for key in keys]
         
-        # Save to vector database
-        if CHROMADB_AVAILABLE and self.collection is not None:
-            try:
-                self.collection.add(
-                    documents=[entry.processed_text],
-                    metadatas=[{
-                        "entry_id": entry_id,
-                        "format_type": entry.format_type,
-                        "timestamp": datetime.now().isoformat()
-                    }],
-                    ids=[f"entry_{entry_id}"]
-                )
-            except Exception as e:
-                print(f"Warning: Failed to add to vector database: {e}")
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            embeddings = self._embed([queries[i] for i in missing])
+            with self._query_embedding_lock:
+                for i, embedding in zip(missing, embeddings):
+                    vectors[i] = embedding
+                    self._query_embedding_cache[keys[i]] = embedding
         
-        return entry_id
+        return np.ascontiguousarray(np.stack(vectors), dtype=np.float32)
+    
+    def _add_vectors(self, batch: List[Tuple[int, str]]) -> None:
+        """Embed a batch of (entry_id, text) pairs and add them to the index."""
+        try:
+            embeddings = self._embed([text for _, text in batch])
+            ids = np.array([entry_id for entry_id, _ in batch], dtype=np.int64)
+            with self._index_lock:
+                self.index.add_with_ids(embeddings, ids)
+        except Exception as e:
+            print(f"Warning: Failed to add {len(batch)} entries to vector index: {e}")
     
     def search(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
         """Search knowledge base entries."""
-        results = []
+        return self.search_batch([query], limit)[0]
+    
+    def search_batch(self, queries: List[str], limit: int = 10) -> List[List[Dict[str, Any]]]:
+        """Search knowledge base entries for several queries at once."""
+        results: Dict[str, List[Dict[str, Any]]] = {}
+        with self._search_cache_lock:
+            generation = self._search_generation
+            for query in queries:
+                cached = self._search_cache.get((query, limit))
+                if cached is not None:
+                    results[query] = cached
+        
+        misses = [query for query in dict.fromkeys(queries) if query not in results]
+        if misses:
+            vector_entry_ids = self._vector_search(misses, limit)
+            for query, entry_ids in zip(misses, vector_entry_ids):
+                entries = self._get_entries_by_ids(entry_ids) if entry_ids else []
+                
+                # Fallback to text search
+                if not entries:
+                    entries = self._text_search(query, limit)
+                results[query] = entries
+            
+            with self._search_cache_lock:
+                # A write landed while searching; these results may already be stale
+                if generation == self._search_generation:
+                    for query in misses:
+                        self._search_cache[(query, limit)] = results[query]
+        
+        return [results[query] for query in queries]
+    
+    def _vector_search(self, queries: List[str], limit: int) -> List[List[int]]:
+        """Return matching entry IDs per query from the vector index."""
+        entry_ids: List[List[int]] = [[] for _ in queries]
         
-        # Semantic search using vector database
-        if CHROMADB_AVAILABLE and self.collection is not None:
+        # Semantic search using the vector index
+        if self.index is not None:
             try:
-                vector_results = self.collection.query(
-                    query_texts=[query],
-                    n_results=limit
-                )
+                embeddings = self._embed_queries(queries)
+                with self._index_lock:
+                    _, ids = self.index.search(embeddings, limit)
                 
-                if (vector_results and 
-                    vector_results.get("metadatas") and 
-                    len(vector_results["metadatas"]) > 0):
-                    
-                    entry_ids = []
-                    for metadata in vector_results["metadatas"][0]:
-                        if isinstance(metadata, dict) and "entry_id" in metadata:
-                            try:
-                                entry_ids.append(int(metadata["entry_id"]))
-                            except (ValueError, TypeError):
-                                continue
-                    
-                    if entry_ids:
-                        results = self._get_entries_by_ids(entry_ids)
+                for i, row in enumerate(ids):
+                    entry_ids[i] = [int(entry_id) for entry_id in row if entry_id >= 0]
                         
             except Exception as e:
                 print(f"Warning: Vector search failed: {e}")
         
-        # Fallback to text search
-        if not results:
-            results = self._text_search(query, limit)
-        
-        return results
+        return entry_ids
+    
+    def _invalidate_search_cache(self) -> None:
+        """Drop cached search results after the entries changed."""
+        with self._search_cache_lock:
+            self._search_generation += 1
+            self._search_cache.clear()
     
     def _get_entries_by_ids(self, entry_ids: List[int]) -> List[Dict[str, Any]]:
         """Get entries by their IDs from SQLite."""
         if not entry_ids:
             return []
         
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
+        cursor = self._conn().cursor()
         
-        placeholders = ",".join("?" * len(entry_ids))
+        # One JSON parameter keeps the statement text (and its cached plan) constant
         cursor.execute(f"""
-            SELECT * FROM entries 
-            WHERE id IN ({placeholders})
+            SELECT {ENTRY_SELECT} FROM entries 
+            WHERE id IN (SELECT value FROM json_each(?))
             ORDER BY timestamp DESC
-        """, entry_ids)
-        
-        entries = [dict(row) for row in cursor.fetchall()]
-        conn.close()
+        """, (orjson.dumps(entry_ids).decode(),))
         
-        # Parse metadata JSON
-        for entry in entries:
-            if entry["metadata"]:
+        return self._rows_to_entries(cursor)
+    
+    @staticmethod
+    def _rows_to_entries(rows: Iterable[sqlite3.Row]) -> List[Dict[str, Any]]:
+        """Convert entry rows to dicts, parsing the metadata JSON column."""
+        # Callers pass the cursor so rows are converted as fetched, not after fetchall()
+        entries = []
+        for row in rows:
+            entry = dict(row)
+            metadata = entry["metadata"]
+            if metadata:
                 try:
-                    entry["metadata"] = json.loads(entry["metadata"])
-                except json.JSONDecodeError:
+                    entry["metadata"] = orjson.loads(metadata)
+                except orjson.JSONDecodeError:
                     entry["metadata"] = {}
-        
+            entries.append(entry)
         return entries
     
+    @staticmethod
+    def _fts_query(query: str) -> str:
+        """Quote each search term as an FTS5 prefix phrase."""
+        terms = [term.replace('"', '""') for term in query.split()]
+        return " ".join(f'"{term}"*' for term in terms)
+    
     def _text_search(self, query: str, limit: int) -> List[Dict[str, Any]]:
         """Fallback text search in SQLite."""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
+        cursor = self._conn().cursor()
         
-        cursor.execute("""
-            SELECT * FROM entries 
+        fts_query = self._fts_query(query) if self.fts_enabled else ""
+        if fts_query:
+            cursor.execute(f"""
+                SELECT {ENTRY_SELECT_E} FROM entries e
+                JOIN entries_fts f ON f.rowid = e.id
+                WHERE entries_fts MATCH ?
+                ORDER BY f.rank
+                LIMIT ?
+            """, (fts_query, limit))
+            return self._rows_to_entries(cursor)
+        
+        cursor.execute(f"""
+            SELECT {ENTRY_SELECT} FROM entries 
             WHERE original_text LIKE ? OR processed_text LIKE ?
             ORDER BY timestamp DESC
             LIMIT ?
         """, (f"%{query}%", f"%{query}%", limit))
         
-        entries = [dict(row) for row in cursor.fetchall()]
-        conn.close()
-        
-        # Parse metadata JSON
-        for entry in entries:
-            if entry["metadata"]:
-                try:
-                    entry["metadata"] = json.loads(entry["metadata"])
-                except json.JSONDecodeError:
-                    entry["metadata"] = {}
-        
-        return entries
+        return self._rows_to_entries(cursor)
     
-    def list_entries(self, limit: int = 50) -> List[Dict[str, Any]]:
-        """List recent entries."""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
+    def list_entries(self, limit: int = 50, filename: Optional[str] = None) -> List[Dict[str, Any]]:
+        """List recent entries, optionally only those for one source filename."""
+        cursor = self._conn().cursor()
         
-        cursor.execute("""
-            SELECT * FROM entries 
+        if filename is not None:
+            cursor.execute(f"""
+                SELECT {ENTRY_SELECT} FROM entries 
+                WHERE meta_filename = ?
+                ORDER BY timestamp DESC
+                LIMIT ?
+            """, (filename, limit))
+            return self._rows_to_entries(cursor)
+        
+        cursor.execute(f"""
+            SELECT {ENTRY_SELECT} FROM entries 
             ORDER BY timestamp DESC
             LIMIT ?
         """, (limit,))
         
-        entries = [dict(row) for row in cursor.fetchall()]
-        conn.close()
-        
-        # Parse metadata JSON
-        for entry in entries:
-            if entry["metadata"]:
-                try:
-                    entry["metadata"] = json.loads(entry["metadata"])
-                except json.JSONDecodeError:
-                    entry["metadata"] = {}
-        
-        return entries
+        return self._rows_to_entries(cursor)
     
     def get_entry(self, entry_id: int) -> Optional[Dict[str, Any]]:
         """Get a specific entry by ID."""
@@ -287,66 +723,79 @@ class KnowledgeBaseService:
     
     def update_edited_text(self, entry_id: int, edited_text: str) -> bool:
         """Update the edited text for an entry and learn from corrections."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
         try:
-            # Get the original processed text
-            cursor.execute("SELECT processed_text FROM entries WHERE id = ?", (entry_id,))
-            row = cursor.fetchone()
-            if not row:
-                return False
-            
-            processed_text = row[0]
-            
-            # Update the edited text
-            cursor.execute(
-                "UPDATE entries SET edited_text = ? WHERE id = ?",
-                (edited_text, entry_id)
-            )
-            
-            # Learn from the corrections
-            self._learn_corrections(conn, entry_id, processed_text, edited_text)
-            
-            conn.commit()
+            # Take the write lock up front so the read and the writes see one snapshot
+            with self.transaction() as conn:
+                cursor = conn.cursor()
+                
+                # Get the original processed text
+                cursor.execute("SELECT processed_text FROM entries WHERE id = ?", (entry_id,))
+                row = cursor.fetchone()
+                if not row:
+                    return False
+                
+                processed_text = row[0]
+                
+                # Update the edited text
+                cursor.execute(
+                    "UPDATE entries SET edited_text = ? WHERE id = ?",
+                    (edited_text, entry_id)
+                )
+                
+                # Learn from the corrections
+                changed_words = self._learn_corrections(conn, entry_id, processed_text, edited_text)
+                
+                # Only committed corrections may reach the in-memory cache
+                self._after_commit(self._invalidate_search_cache)
+                self._after_commit(lambda: self._refresh_corrections_cache(changed_words))
             return True
             
         except Exception as e:
-            conn.rollback()
             print(f"Error updating edited text: {e}")
             return False
-        finally:
-            conn.close()
     
-    def _learn_corrections(self, conn, entry_id: int, original: str, corrected: str):
-        """Analyze differences and learn correction patterns."""
-        import difflib
+    def _learn_corrections(self, conn, entry_id: int, original: str, corrected: str) -> Set[str]:
+        """Analyze differences and learn correction patterns.
         
+        Returns the original words whose corrections changed.
+        """
         original_words = original.split()
         corrected_words = corrected.split()
         
-        matcher = difflib.SequenceMatcher(None, original_words, corrected_words)
+        # (original_word, corrected_word) -> [context_before, context_after, type, count]
+        corrections: Dict[Tuple[str, str], list] = {}
+        terms: List[Tuple[str, str]] = []
         
+        # difflib groups a multi-word rewrite into one replace block; Levenshtein
+        # opcodes would split it into insert + 1:1 replaces and pair the wrong words
+        matcher = difflib.SequenceMatcher(None, original_words, corrected_words)
         for tag, i1, i2, j1, j2 in matcher.get_opcodes():
             if tag == 'replace':
                 original_word = ' '.join(original_words[i1:i2])
                 corrected_word = ' '.join(corrected_words[j1:j2])
                 
-                context_before = ' '.join(original_words[max(0, i1-2):i1])
-                context_after = ' '.join(original_words[i2:min(len(original_words), i2+2)])
-                
-                correction_type = self._classify_correction(original_word, corrected_word)
-                
-                self._store_correction(conn, entry_id, original_word, corrected_word, 
-                                     context_before, context_after, correction_type)
+                key = (original_word, corrected_word)
+                if key in corrections:
+                    corrections[key][3] += 1
+                    correction_type = corrections[key][2]
+                else:
+                    context_before = ' '.join(original_words[max(0, i1-2):i1])
+                    context_after = ' '.join(original_words[i2:min(len(original_words), i2+2)])
+                    correction_type = self._classify_correction(original_word, corrected_word)
+                    corrections[key] = [context_before, context_after, correction_type, 1]
                 
                 if correction_type in ['proper_name', 'terminology']:
-                    self._store_terminology(conn, corrected_word, correction_type)
+                    terms.append((corrected_word, correction_type))
+        
+        if corrections:
+            self._store_corrections(conn, entry_id, corrections)
+        if terms:
+            self._store_terminology(conn, terms)
+        
+        return {original_word for original_word, _ in corrections}
     
     def _classify_correction(self, original: str, corrected: str) -> str:
         """Classify the type of correction made."""
-        import difflib
-        
         if corrected[0].isupper() and not original[0].isupper():
             return 'proper_name'
         elif len(corrected.split()) == 1 and corrected.istitle():
@@ -354,7 +803,7 @@ class KnowledgeBaseService:
         elif original.lower() == corrected.lower():
             return 'capitalization'
         elif len(original) > 3 and len(corrected) > 3:
-            similarity = difflib.SequenceMatcher(None, original.lower(), corrected.lower()).ratio()
+            similarity = fuzz.ratio(original.lower(), corrected.lower()) / 100.0
             if similarity > 0.7:
                 return 'mishearing'
             else:
@@ -362,73 +811,90 @@ class KnowledgeBaseService:
         else:
             return 'grammar'
     
-    def _store_correction(self, conn, entry_id: int, original_word: str, 
-                         corrected_word: str, context_before: str, context_after: str, 
-                         correction_type: str):
-        """Store a correction in the database."""
+    def _store_corrections(self, conn, entry_id: int,
+                           corrections: Dict[Tuple[str, str], list]):
+        """Store a batch of corrections, bumping usage of already known pairs."""
         cursor = conn.cursor()
         
-        cursor.execute("""
-            SELECT id, usage_count FROM corrections 
-            WHERE original_word = ? AND corrected_word = ?
-        """, (original_word, corrected_word))
-        
-        row = cursor.fetchone()
-        if row:
-            correction_id, usage_count = row
-            cursor.execute("""
-                UPDATE corrections 
-                SET usage_count = ?, last_used = CURRENT_TIMESTAMP
-                WHERE id = ?
-            """, (usage_count + 1, correction_id))
-        else:
-            cursor.execute("""
-                INSERT INTO corrections 
-                (entry_id, original_word, corrected_word, context_before, context_after, correction_type)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """, (entry_id, original_word, corrected_word, context_before, context_after, correction_type))
+        cursor.executemany("""
+            INSERT INTO corrections 
+            (entry_id, original_word, corrected_word, context_before, context_after,
+             correction_type, usage_count)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(original_word, corrected_word) DO UPDATE SET
+                usage_count = usage_count + excluded.usage_count,
+                last_used = CURRENT_TIMESTAMP
+        """, [
+            (entry_id, original_word, corrected_word, context_before, context_after,
+             correction_type, count)
+            for (original_word, corrected_word), (context_before, context_after,
+                                                  correction_type, count) in corrections.items()
+        ])
     
-    def _store_terminology(self, conn, term: str, category: str):
-        """Store or update terminology."""
+    def _store_terminology(self, conn, terms: List[Tuple[str, str]]):
+        """Store new terminology or bump the frequency of known terms."""
         cursor = conn.cursor()
         
-        cursor.execute("SELECT id, frequency FROM terminology WHERE term = ?", (term,))
-        row = cursor.fetchone()
+        cursor.executemany("""
+            INSERT INTO terminology (term, category)
+            VALUES (?, ?)
+            ON CONFLICT(term) DO UPDATE SET
+                frequency = frequency + 1,
+                last_used = CURRENT_TIMESTAMP
+        """, terms)
+    
+    @staticmethod
+    def _top_corrections(rows: List[sqlite3.Row]) -> Dict[str, List[tuple]]:
+        """Group correction rows (ordered by rank) into the top 3 per original word."""
+        top_corrections: Dict[str, List[tuple]] = {}
+        for original_word, corrected_word, usage_count, correction_type in rows:
+            matches = top_corrections.setdefault(original_word, [])
+            if len(matches) < 3:
+                matches.append((corrected_word, usage_count, correction_type))
+        return top_corrections
+    
+    def _load_corrections_cache(self) -> None:
+        """Load all learned corrections into memory."""
+        cursor = self._conn().cursor()
+        cursor.execute("""
+            SELECT original_word, corrected_word, usage_count, correction_type
+            FROM corrections 
+            ORDER BY usage_count DESC, last_used DESC
+        """)
+        top_corrections = self._top_corrections(cursor.fetchall())
+        with self._corrections_lock:
+            self._corrections_cache = top_corrections
+    
+    def _refresh_corrections_cache(self, words: Set[str]) -> None:
+        """Reload the cached corrections for the given original words."""
+        if not words:
+            return
         
-        if row:
-            term_id, frequency = row
-            cursor.execute("""
-                UPDATE terminology 
-                SET frequency = ?, last_used = CURRENT_TIMESTAMP
-                WHERE id = ?
-            """, (frequency + 1, term_id))
-        else:
-            cursor.execute("""
-                INSERT INTO terminology (term, category)
-                VALUES (?, ?)
-            """, (term, category))
+        word_list = list(words)
+        cursor = self._conn().cursor()
+        
+        cursor.execute("""
+            SELECT original_word, corrected_word, usage_count, correction_type
+            FROM corrections 
+            WHERE original_word IN (SELECT value FROM json_each(?))
+            ORDER BY usage_count DESC, last_used DESC
+        """, (orjson.dumps(word_list).decode(),))
+        top_corrections = self._top_corrections(cursor.fetchall())
+        
+        with self._corrections_lock:
+            for word in word_list:
+                if word in top_corrections:
+                    self._corrections_cache[word] = top_corrections[word]
+                else:
+                    self._corrections_cache.pop(word, None)
     
     def get_corrections_for_text(self, text: str) -> List[Dict]:
         """Get suggested corrections for a text based on learned patterns."""
-        import difflib
-        
-        words = text.split()
         suggestions = []
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        try:
-            for i, word in enumerate(words):
-                cursor.execute("""
-                    SELECT corrected_word, usage_count, correction_type
-                    FROM corrections 
-                    WHERE original_word = ?
-                    ORDER BY usage_count DESC, last_used DESC
-                    LIMIT 3
-                """, (word,))
-                
-                for corrected_word, usage_count, correction_type in cursor.fetchall():
+        with self._corrections_lock:
+            for i, word in enumerate(text.split()):
+                for corrected_word, usage_count, correction_type in self._corrections_cache.get(word, ()):
                     suggestions.append({
                         'position': i,
                         'original': word,
@@ -436,47 +902,45 @@ class KnowledgeBaseService:
                         'confidence': min(1.0, usage_count / 10.0),
                         'type': correction_type
                     })
-            
-            return sorted(suggestions, key=lambda x: x['confidence'], reverse=True)
-            
-        finally:
-            conn.close()
+        
+        return sorted(suggestions, key=lambda x: x['confidence'], reverse=True)
     
     def get_stats(self) -> Dict:
         """Get knowledge base statistics."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        cursor = self._conn().cursor()
         
-        try:
-            cursor.execute("SELECT COUNT(*) FROM entries")
-            total_entries = cursor.fetchone()[0]
-            
-            cursor.execute("SELECT COUNT(*) FROM entries WHERE edited_text IS NOT NULL")
-            edited_entries = cursor.fetchone()[0]
-            
-            cursor.execute("SELECT COUNT(*) FROM corrections")
-            total_corrections = cursor.fetchone()[0]
-            
-            cursor.execute("SELECT COUNT(*) FROM terminology")
-            total_terms = cursor.fetchone()[0]
-            
-            return {
-                'total_entries': total_entries,
-                'edited_entries': edited_entries,
-                'total_corrections': total_corrections,
-                'total_terminology': total_terms,
-                'learning_rate': edited_entries / max(1, total_entries)
-            }
-        finally:
-            conn.close()
+        cursor.execute("""
+            SELECT
+                (SELECT COUNT(*) FROM entries),
+                (SELECT COUNT(*) FROM entries WHERE edited_text IS NOT NULL),
+                (SELECT COUNT(*) FROM corrections),
+                (SELECT COUNT(*) FROM terminology)
+        """)
+        total_entries, edited_entries, total_corrections, total_terms = cursor.fetchone()
+        
+        return {
+            'total_entries': total_entries,
+            'edited_entries': edited_entries,
+            'total_corrections': total_corrections,
+            'total_terminology': total_terms,
+            'learning_rate': edited_entries / max(1, total_entries)
+        }
 
 # API Routes
 @app.on_event("startup")
 async def startup_event():
     global kb
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=DB_WORKERS, thread_name_prefix="kb-db")
+    )
     kb = KnowledgeBaseService()
     print("Knowledge Base Service started successfully!")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    if kb is not None:
+        kb.close()
+
 @app.get("/health")
 async def health():
     return {"status": "ok", "service": "Knowledge Base Service"}
@@ -485,16 +949,25 @@ async def health():
 async def create_entry(entry: EntryCreate):
     """Create a new knowledge base entry."""
     try:
-        entry_id = kb.save_entry(entry)
+        entry_id = await asyncio.to_thread(kb.save_entry, entry)
         return {"entry_id": entry_id, "status": "created"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/entries/batch")
+async def create_entries(batch: BatchEntryCreate):
+    """Create several knowledge base entries in one transaction."""
+    try:
+        entry_ids = await asyncio.to_thread(kb.save_entries, batch.entries)
+        return {"entry_ids": entry_ids, "status": "created"}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.get("/entries")
-async def list_entries(limit: int = 50):
+async def list_entries(limit: int = 50, filename: Optional[str] = None):
     """List recent entries."""
     try:
-        entries = kb.list_entries(limit)
+        entries = await asyncio.to_thread(kb.list_entries, limit, filename)
         return {"entries": entries}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -503,7 +976,7 @@ async def list_entries(limit: int = 50):
 async def get_entry(entry_id: int):
     """Get a specific entry by ID."""
     try:
-        entry = kb.get_entry(entry_id)
+        entry = await asyncio.to_thread(kb.get_entry, entry_id)
         if not entry:
             raise HTTPException(status_code=404, detail="Entry not found")
         return entry
@@ -516,7 +989,7 @@ async def get_entry(entry_id: int):
 async def update_entry(entry_id: int, update: EntryUpdate):
     """Update an entry with edited text and learn from corrections."""
     try:
-        success = kb.update_edited_text(entry_id, update.edited_text)
+        success = await asyncio.to_thread(kb.update_edited_text, entry_id, update.edited_text)
         if not success:
             raise HTTPException(status_code=404, detail="Entry not found")
         return {"status": "updated", "learned": True}
@@ -529,7 +1002,16 @@ async def update_entry(entry_id: int, update: EntryUpdate):
 async def search_entries(query: SearchQuery):
     """Search knowledge base entries."""
     try:
-        results = kb.search(query.query, query.limit)
+        results = await asyncio.to_thread(kb.search, query.query, query.limit)
+        return {"results": results}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/search/batch")
+async def search_entries_batch(query: BatchSearchQuery):
+    """Search knowledge base entries for several queries in one call."""
+    try:
+        results = await asyncio.to_thread(kb.search_batch, query.queries, query.limit)
         return {"results": results}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -538,7 +1020,16 @@ async def search_entries(query: SearchQuery):
 async def get_corrections(text: str):
     """Get correction suggestions for text."""
     try:
-        suggestions = kb.get_corrections_for_text(text)
+        suggestions = await asyncio.to_thread(kb.get_corrections_for_text, text)
+        return {"suggestions": suggestions}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/corrections")
+async def get_corrections_for_body(query: CorrectionsQuery):
+    """Get correction suggestions for text sent in the request body."""
+    try:
+        suggestions = await asyncio.to_thread(kb.get_corrections_for_text, query.text)
         return {"suggestions": suggestions}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -547,11 +1038,12 @@ async def get_corrections(text: str):
 async def get_stats():
     """Get knowledge base statistics."""
     try:
-        stats = kb.get_stats()
+        stats = await asyncio.to_thread(kb.get_stats)
         return stats
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8001)
+    # Single process: the FAISS index and its write-behind queue live in memory
+    uvicorn.run(app, host="0.0.0.0", port=8001, loop="uvloop", http="httptools")
@@ -2,19 +2,33 @@
 
 from fastapi import FastAPI, UploadFile, File, HTTPException, Form
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
-import requests
-import tempfile
-import shutil
-from pathlib import Path
-from typing import Optional, Dict, Any, Literal
-import subprocess
+import httpx
+import asyncio
+import hashlib
+from collections import OrderedDict
+import time
+from concurrent.futures import ThreadPoolExecutor
+from cachetools import LRUCache
+from typing import Optional, Dict, Any, List, Literal, Union, AsyncIterator
+import orjson
 import os
-import whisper
-import torch
+import logging
+import ctranslate2
+import numpy as np
+from faster_whisper import BatchedInferencePipeline, WhisperModel, decode_audio
+
+logging.basicConfig(
+    level=os.environ.get("LOG_LEVEL", "INFO").upper(),
+    format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+)
+logger = logging.getLogger("stt-core")
+# httpx logs every Ollama call at INFO; keep that off the hot path
+logging.getLogger("httpx").setLevel(logging.WARNING)
 
-app = FastAPI(title="STT Core Service", version="1.0.0")
+app = FastAPI(title="STT Core Service", version="1.0.0", default_response_class=ORJSONResponse)
 
 # Enable CORS
 app.add_middleware(
@@ -32,28 +46,144 @@ app.mount("/static", StaticFiles(directory="static"), name="static")
 KNOWLEDGE_BASE_URL = "http://knowledge-service:8001"
 OLLAMA_URL = "http://ollama:11434"
 
+# Shared async HTTP client for Ollama, created at startup
+ollama_client: Optional[httpx.AsyncClient] = None
+# Strong references to fire-and-forget background tasks
+background_tasks = set()
+# Installed correction models, refreshed from /api/tags (None until first check)
+available_german_models: Optional[List[str]] = None
+OLLAMA_MODELS_REFRESH_INTERVAL = 60
+# Last /api/tags probe (None = Ollama unreachable), reused for OLLAMA_STATUS_TTL seconds
+OLLAMA_STATUS_TTL = 5
+ollama_tags_cache: Dict[str, Any] = {"ts": 0.0, "models": None}
+# Coalesces concurrent probes into one request; created at startup
+ollama_probe_lock: Optional[asyncio.Lock] = None
+
+
+def parse_keep_alive(value: str) -> Union[int, float, str]:
+    """Ollama takes keep_alive as seconds (number) or a duration string with a unit ("5m")."""
+    for number in (int, float):
+        try:
+            return number(value)
+        except ValueError:
+            pass
+    return value
+
+
+# How long Ollama keeps a model loaded after a request (-1 = never unload)
+OLLAMA_KEEP_ALIVE = parse_keep_alive(os.environ.get("OLLAMA_KEEP_ALIVE", "-1"))
+# Correction models raced concurrently (needs OLLAMA_NUM_PARALLEL >= 2)
+OLLAMA_RACE_WIDTH = 2
+# Shorter texts (silent or failed recordings) skip the correction model
+MIN_CORRECTION_CHARS = 3
+# Corrected text keyed by sha256 of (preferred model, input text)
+correction_cache = LRUCache(maxsize=1024)
+
 # ASR Models
 whisper_model = None
 whisper_model_name = None
-whisper_models_cache = {}  # name -> loaded model
+whisper_models_cache = OrderedDict()  # name -> loaded model, least recently used first
+# Lazily loaded models kept in memory at once, including the default model
+WHISPER_MAX_LOADED_MODELS = int(os.environ.get("WHISPER_MAX_LOADED_MODELS", "2"))
+# Default model per device; large models are far too slow for CPU-only hosts
+DEFAULT_WHISPER_MODELS = {
+    "cuda": "large-v3-turbo",  # large-v3 encoder with a 4-layer distilled decoder
+    "cpu": "small",
+}
+# UI selector values for the non-default Whisper sizes
+WHISPER_MODEL_ALIASES = {
+    "whisper-large": "large-v3",
+    "whisper-medium": "medium",
+}
+# Number of 30s VAD chunks decoded together per forward pass
+WHISPER_BATCH_SIZE = int(os.environ.get("WHISPER_BATCH_SIZE", "16"))
+# Greedy decoding without temperature fallback, trading some accuracy on hard audio for latency
+WHISPER_FAST_DECODING = os.environ.get("WHISPER_FAST_DECODING", "").lower() in ("1", "true", "yes")
+WHISPER_DECODE_OPTIONS = (
+    {"beam_size": 1, "best_of": 1, "temperature": 0.0, "condition_on_previous_text": False}
+    if WHISPER_FAST_DECODING else {"beam_size": 5}
+)
+# One GPU, so inference runs on a single dedicated worker off the event loop
+whisper_executor: Optional[ThreadPoolExecutor] = None
+# Whisper input sample rate
+SAMPLE_RATE = 16000
+
+def whisper_device() -> str:
+    """Return the configured Whisper device, detecting CUDA when unset."""
+    default = "cuda" if ctranslate2.get_cuda_device_count() > 0 else "cpu"
+    return os.environ.get("WHISPER_DEVICE", default)
+
+def load_whisper_model(name: str, device: str) -> BatchedInferencePipeline:
+    """Load a faster-whisper (CTranslate2) model with int8 weights for the device."""
+    compute_type = "int8_float16" if device == "cuda" else "int8"
+    # Download into the mounted model volume so rebuilt containers reuse it
+    model = WhisperModel(
+        name,
+        device=device,
+        compute_type=compute_type,
+        download_root=os.environ.get("WHISPER_CACHE")
+    )
+    return BatchedInferencePipeline(model=model)
+
+def warmup_whisper_model(model: BatchedInferencePipeline):
+    """Decode one second of silence so CUDA/CTranslate2 init isn't paid by the first request."""
+    silence = np.zeros(SAMPLE_RATE, dtype=np.float32)
+    segments, _ = model.model.transcribe(silence, language="de", beam_size=1, vad_filter=False)
+    for _ in segments:
+        pass
 
 @app.on_event("startup")
 async def startup_event():
-    global whisper_model, whisper_model_name
-    print("Loading Whisper model...")
-    device = os.environ.get("WHISPER_DEVICE", "cpu")
-    model_name = os.environ.get("WHISPER_MODEL", "large-v3")
+    global whisper_model, whisper_model_name, ollama_client, whisper_executor, ollama_probe_lock
+    ollama_probe_lock = asyncio.Lock()
+    whisper_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="whisper")
+    ollama_client = httpx.AsyncClient(
+        timeout=120,
+        limits=httpx.Limits(max_keepalive_connections=20)
+    )
+    kb_client.open()
+    start_background_task(refresh_available_models_loop)
+    start_background_task(prewarm_ollama)
+    logger.info("Loading Whisper model...")
+    device = whisper_device()
+    model_name = os.environ.get("WHISPER_MODEL") or DEFAULT_WHISPER_MODELS.get(device, "small")
+    logger.info("Selected Whisper model '%s' for device %s", model_name, device)
     try:
-        whisper_model = whisper.load_model(model_name, device=device)
+        whisper_model = load_whisper_model(model_name, device)
         whisper_model_name = model_name
         whisper_models_cache[model_name] = whisper_model
-        print(f"Whisper model '{model_name}' loaded on {device}")
+        logger.info("Whisper model '%s' loaded on %s", model_name, device)
     except Exception as e:
-        print(f"Failed to load {model_name}, falling back to base: {e}")
-        whisper_model = whisper.load_model("base", device=device)
+        logger.warning("Failed to load %s, falling back to base: %s", model_name, e)
+        whisper_model = load_whisper_model("base", device)
         whisper_model_name = "base"
         whisper_models_cache["base"] = whisper_model
-        print(f"Whisper model 'base' loaded on {device}")
+        logger.info("Whisper model 'base' loaded on %s", device)
+    try:
+        warmup_whisper_model(whisper_model)
+        logger.info("Whisper warmup complete")
+    except Exception as e:
+        logger.warning("Whisper warmup failed: %s", e)
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    for task in list(background_tasks):
+        task.cancel()
+    if ollama_client is not None:
+        await ollama_client.aclose()
+    await kb_client.close()
+    whisper_executor.shutdown(wait=False)
+
+def run_in_background(coro):
+    """Schedule a coroutine without awaiting its result; it is cancelled on shutdown."""
+    task = asyncio.create_task(coro)
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+    return task
+
+def start_background_task(coro_func):
+    """Start a background coroutine that is cancelled on shutdown."""
+    return run_in_background(coro_func())
 
 # Data models
 class ProcessRequest(BaseModel):
@@ -74,147 +204,343 @@ class KnowledgeClient:
     
     def __init__(self, base_url: str):
         self.base_url = base_url
+        # Keep-alive connection pool shared by all requests; opened at startup
+        self.client: Optional[httpx.AsyncClient] = None
     
-    def save_entry(self, original_text: str, processed_text: str, format_type: str, metadata: Optional[Dict] = None):
+    def open(self):
+        """Create the pooled HTTP client (needs a running event loop's lifetime)."""
+        self.client = httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=5,
+            limits=httpx.Limits(max_keepalive_connections=10)
+        )
+    
+    async def close(self):
+        """Close the pooled HTTP client."""
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+    
+    async def save_entry(self, original_text: str, processed_text: str, format_type: str, metadata: Optional[Dict] = None):
         """Save entry to knowledge base."""
         try:
-            response = requests.post(f"{self.base_url}/entries", json={
+            response = await self.client.post("/entries", json={
                 "original_text": original_text,
                 "processed_text": processed_text,
                 "format_type": format_type,
                 "metadata": metadata or {}
-            }, timeout=5)
+            })
             response.raise_for_status()
             return response.json()
         except Exception as e:
-            print(f"Failed to save to knowledge base: {e}")
+            logger.warning("Failed to save to knowledge base: %s", e)
             return None
     
-    def search(self, query: str, limit: int = 5):
+    async def search(self, query: str, limit: int = 5):
         """Search knowledge base."""
         try:
-            response = requests.post(f"{self.base_url}/search", json={
+            response = await self.client.post("/search", json={
                 "query": query,
                 "limit": limit
-            }, timeout=5)
+            })
             response.raise_for_status()
             return response.json()
         except Exception as e:
-            print(f"Failed to search knowledge base: {e}")
+            logger.warning("Failed to search knowledge base: %s", e)
             return None
     
-    def get_corrections(self, text: str):
+    async def get_corrections(self, text: str):
         """Get correction suggestions."""
         try:
-            response = requests.get(f"{self.base_url}/corrections/{text}", timeout=5)
+            response = await self.client.post("/corrections", json={"text": text})
             response.raise_for_status()
             return response.json()
         except Exception as e:
-            print(f"Failed to get corrections: {e}")
+            logger.warning("Failed to get corrections: %s", e)
             return None
 
 # Global clients
 kb_client = KnowledgeClient(KNOWLEDGE_BASE_URL)
 
-def convert_audio_to_wav(input_path: str, output_path: str) -> bool:
-    """Convert audio file to WAV format using ffmpeg."""
+def decode_upload(upload: UploadFile) -> np.ndarray:
+    """Decode an uploaded audio file in-process to 16kHz mono float32 samples."""
     try:
-        command = [
-            "ffmpeg", "-i", input_path, 
-            "-acodec", "pcm_s16le", 
-            "-ar", "16000", 
-            "-ac", "1", 
-            output_path, "-y"
-        ]
-        result = subprocess.run(command, capture_output=True, text=True, check=True)
-        return True
-    except subprocess.CalledProcessError as e:
-        print(f"Audio conversion failed: {e}")
-        return False
-    except FileNotFoundError:
-        print("ffmpeg not found")
-        return False
+        # UploadFile is already spooled (in RAM when small), so decode it directly
+        upload.file.seek(0)
+        return decode_audio(upload.file, sampling_rate=SAMPLE_RATE)
+    except Exception as e:
+        logger.warning("Audio decoding failed: %s", e)
+        raise HTTPException(status_code=400, detail="Audio conversion failed")
 
 def get_whisper_model(name: str):
     """Return loaded whisper model by name, loading lazily if needed."""
     global whisper_model, whisper_model_name
-    device = os.environ.get("WHISPER_DEVICE", "cpu")
+    device = whisper_device()
     # Normalize selector values to whisper model names
-    name_map = {"whisper": whisper_model_name or "large-v3",
-                "whisper-large": "large-v3",
-                "whisper-medium": "medium"}
-    resolved = name_map.get(name, name)
-    if resolved not in whisper_models_cache:
-        print(f"Lazy-loading whisper model '{resolved}'...")
-        whisper_models_cache[resolved] = whisper.load_model(resolved, device=device)
-        print(f"Model '{resolved}' loaded.")
+    if name == "whisper":
+        resolved = whisper_model_name or DEFAULT_WHISPER_MODELS.get(device, "small")
+    else:
+        resolved = WHISPER_MODEL_ALIASES[name]
+    if resolved in whisper_models_cache:
+        whisper_models_cache.move_to_end(resolved)
+        return whisper_models_cache[resolved]
+
+    # Evict the least recently used extra model; the default model stays loaded
+    while len(whisper_models_cache) >= WHISPER_MAX_LOADED_MODELS:
+        evictable = [n for n in whisper_models_cache if n != whisper_model_name]
+        if not evictable:
+            break
+        logger.info("Unloading whisper model '%s'", evictable[0])
+        del whisper_models_cache[evictable[0]]
+
+    logger.info("Lazy-loading whisper model '%s'...", resolved)
+    whisper_models_cache[resolved] = load_whisper_model(resolved, device)
+    logger.info("Model '%s' loaded.", resolved)
     return whisper_models_cache[resolved]
 
-def transcribe_audio(audio_path: str) -> str:
+def run_whisper(model: BatchedInferencePipeline, audio: Union[str, np.ndarray]) -> str:
+    """Run a batched faster-whisper transcription and join the segment texts."""
+    segments, _ = model.transcribe(
+        audio,
+        language="de",
+        vad_filter=True,
+        batch_size=WHISPER_BATCH_SIZE,
+        **WHISPER_DECODE_OPTIONS
+    )
+    return "".join(segment.text for segment in segments).strip()
+
+async def run_on_whisper_executor(func, *args):
+    """Run a blocking Whisper call on the dedicated inference thread."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(whisper_executor, func, *args)
+
+async def transcribe_audio(audio: Union[str, np.ndarray]) -> str:
     """Transcribe audio using the default loaded Whisper model."""
     if whisper_model is None:
         raise HTTPException(status_code=500, detail="Whisper model not loaded")
     try:
-        result = whisper_model.transcribe(audio_path, language="de")
-        return result["text"].strip()
+        return await run_on_whisper_executor(run_whisper, whisper_model, audio)
     except Exception as e:
-        print(f"Whisper transcription failed: {e}")
+        logger.error("Whisper transcription failed: %s", e)
         raise HTTPException(status_code=500, detail=f"Whisper transcription failed: {str(e)}")
 
-def transcribe_audio_with_model(audio_path: str, asr_model: str) -> str:
+async def transcribe_audio_with_model(audio: Union[str, np.ndarray], asr_model: str) -> str:
     """Transcribe audio using the named model (supports whisper-large / whisper-medium)."""
-    model = get_whisper_model(asr_model)
+    # Only known selectors; arbitrary names would make faster-whisper download any HF repo
+    if asr_model != "whisper" and asr_model not in WHISPER_MODEL_ALIASES:
+        raise HTTPException(status_code=400, detail=f"Unknown ASR model: {asr_model}")
+    model = await run_on_whisper_executor(get_whisper_model, asr_model)
     try:
-        result = model.transcribe(audio_path, language="de")
-        return result["text"].strip()
+        return await run_on_whisper_executor(run_whisper, model, audio)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Whisper transcription failed: {str(e)}")
 
 # Current models ranked for German correction on CPU (updated 2025)
 # gemma3:4b ~3GB, qwen2.5:7b ~4.7GB, mistral:7b ~4.1GB, llama3.2:3b ~2GB
-GERMAN_CORRECTION_MODELS = [
+GERMAN_CORRECTION_MODELS = (
     "gemma3:4b",
     "qwen2.5:7b",
     "mistral:7b",
     "llama3.2:3b",
-]
+)
 
-def process_text_with_ollama(text: str, preferred_model: str = None) -> str:
-    """Correct German text using Ollama. Tries preferred_model first, then falls back."""
-    # Build try order: preferred first, then rest of the list
-    order = ([preferred_model] if preferred_model else []) + [
-        m for m in GERMAN_CORRECTION_MODELS if m != preferred_model
-    ]
+# Display metadata for the correction models, in GERMAN_CORRECTION_MODELS order
+CORRECTION_MODEL_CATALOG = (
+    {"id": "gemma3:4b",    "label": "Gemma 3 4B",     "size": "~3.3GB",  "note": "Best German, Google 2025"},
+    {"id": "qwen2.5:7b",   "label": "Qwen 2.5 7B",    "size": "~4.7GB",  "note": "Strong multilingual"},
+    {"id": "mistral:7b",   "label": "Mistral 7B",     "size": "~4.1GB",  "note": "Solid German"},
+    {"id": "llama3.2:3b",  "label": "Llama 3.2 3B",   "size": "~2.0GB",  "note": "Fast fallback"},
+)
 
-    prompt = f"""Korrigiere bitte den folgenden deutschen Text. Behalte den ursprünglichen Inhalt und Stil bei. Verbessere nur Grammatik, Rechtschreibung und natürlichen Wortfluss. Antworte nur mit dem korrigierten Text:
+async def get_ollama_models() -> Optional[List[str]]:
+    """Return installed Ollama model names, probing /api/tags at most every few seconds."""
+    if time.monotonic() - ollama_tags_cache["ts"] < OLLAMA_STATUS_TTL:
+        return ollama_tags_cache["models"]
 
-{text}"""
+    async with ollama_probe_lock:
+        # Another request may have refreshed the cache while we waited
+        now = time.monotonic()
+        if now - ollama_tags_cache["ts"] < OLLAMA_STATUS_TTL:
+            return ollama_tags_cache["models"]
 
-    for model in order:
+        models = None
         try:
-            response = requests.post(f"{OLLAMA_URL}/api/generate", json={
-                "model": model,
-                "prompt": prompt,
-                "stream": False,
-                "options": {
-                    "temperature": 0.1,
-                    "top_p": 0.9,
-                    "keep_alive": "5m"
-                }
-            }, timeout=120)
-
+            response = await ollama_client.get(f"{OLLAMA_URL}/api/tags", timeout=5)
             if response.status_code == 200:
-                result = response.json()
-                corrected_text = result.get("response", text).strip()
-                print(f"Text corrected with model: {model}")
+                models = [m["name"] for m in response.json().get("models", [])]
+        except Exception as e:
+            logger.warning("Ollama probe failed: %s", e)
+        ollama_tags_cache["ts"] = now
+        ollama_tags_cache["models"] = models
+        return models
+
+async def refresh_available_models():
+    """Update the cached list of installed correction models from Ollama."""
+    global available_german_models
+    models = await get_ollama_models()
+    if models is not None:
+        names = set(models)
+        available_german_models = [m for m in GERMAN_CORRECTION_MODELS if m in names]
+
+async def refresh_available_models_loop():
+    """Keep the installed-model cache fresh in the background."""
+    while True:
+        await refresh_available_models()
+        await asyncio.sleep(OLLAMA_MODELS_REFRESH_INTERVAL)
+
+def build_correction_prompt(text: str) -> str:
+    """Build the German correction prompt for a transcript."""
+    return f"""Korrigiere bitte den folgenden deutschen Text. Behalte den ursprünglichen Inhalt und Stil bei. Verbessere nur Grammatik, Rechtschreibung und natürlichen Wortfluss. Antworte nur mit dem korrigierten Text:
+
+{text}"""
+
+# Sampling options shared by every correction request
+OLLAMA_OPTIONS = {
+    "temperature": 0.1,
+    "top_p": 0.9
+}
+
+def generate_payload(model: str, prompt: str, stream: bool) -> Dict[str, Any]:
+    """Build the /api/generate request body."""
+    return {
+        "model": model,
+        "prompt": prompt,
+        "stream": stream,
+        "keep_alive": OLLAMA_KEEP_ALIVE,
+        "options": OLLAMA_OPTIONS
+    }
+
+async def prewarm_ollama():
+    """Load the first correction model into Ollama so the first request isn't cold."""
+    await refresh_available_models()
+    model = (available_german_models or GERMAN_CORRECTION_MODELS)[0]
+    try:
+        # A generate call without a prompt only loads the model
+        response = await ollama_client.post(f"{OLLAMA_URL}/api/generate", json={
+            "model": model,
+            "keep_alive": OLLAMA_KEEP_ALIVE
+        })
+        response.raise_for_status()
+        logger.info("Ollama model '%s' prewarmed", model)
+    except Exception as e:
+        logger.warning("Failed to prewarm %s: %s", model, e)
+
+async def generate_with_model(model: str, prompt: str) -> str:
+    """Run one non-streaming Ollama generation; raises on failure."""
+    response = await ollama_client.post(
+        f"{OLLAMA_URL}/api/generate", json=generate_payload(model, prompt, False)
+    )
+    response.raise_for_status()
+    return response.json().get("response", "").strip()
+
+async def race_models(models: List[str], prompt: str) -> Optional[str]:
+    """Run the models concurrently and return the first successful result."""
+    tasks = {asyncio.create_task(generate_with_model(m, prompt)): m for m in models}
+    pending = set(tasks)
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is not None:
+                    logger.warning("Failed to process with %s: %s", tasks[task], task.exception())
+                elif not task.result():
+                    logger.warning("Model %s returned an empty correction", tasks[task])
+                else:
+                    logger.debug("Text corrected with model: %s", tasks[task])
+                    return task.result()
+        return None
+    finally:
+        for task in tasks:
+            task.cancel()
+
+async def correct_with_ollama(text: str, preferred_model: str = None) -> Optional[str]:
+    """Correct German text using Ollama. Tries preferred_model first, then falls back."""
+    # Only try models Ollama reports as installed, once that is known
+    candidates = GERMAN_CORRECTION_MODELS
+    if available_german_models:
+        candidates = available_german_models
+
+    prompt = build_correction_prompt(text)
+
+    # An explicitly chosen model is tried on its own before any fallback
+    if preferred_model:
+        try:
+            corrected_text = await generate_with_model(preferred_model, prompt)
+            if corrected_text:
+                logger.debug("Text corrected with model: %s", preferred_model)
                 return corrected_text
+        except Exception as e:
+            logger.warning("Failed to process with %s: %s", preferred_model, e)
+        candidates = [m for m in candidates if m != preferred_model]
 
+    # Race the top candidates so a cold-loading model doesn't stall the request
+    if candidates:
+        corrected_text = await race_models(candidates[:OLLAMA_RACE_WIDTH], prompt)
+        if corrected_text:
+            return corrected_text
+
+    for model in candidates[OLLAMA_RACE_WIDTH:]:
+        try:
+            corrected_text = await generate_with_model(model, prompt)
+            if corrected_text:
+                logger.debug("Text corrected with model: %s", model)
+                return corrected_text
         except Exception as e:
-            print(f"Failed to process with {model}: {e}")
+            logger.warning("Failed to process with %s: %s", model, e)
             continue
 
-    print("All correction models failed, returning original text")
-    return text
+    return None
+
+async def stream_text_with_ollama(text: str, preferred_model: str = None) -> AsyncIterator[str]:
+    """Yield the corrected text as Ollama generates it; yields nothing if every model fails."""
+    candidates = available_german_models or GERMAN_CORRECTION_MODELS
+    order = ([preferred_model] if preferred_model else []) + [
+        m for m in candidates if m != preferred_model
+    ]
+    prompt = build_correction_prompt(text)
+
+    for model in order:
+        started = False
+        try:
+            async with ollama_client.stream(
+                "POST", f"{OLLAMA_URL}/api/generate", json=generate_payload(model, prompt, True)
+            ) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if not line:
+                        continue
+                    chunk = orjson.loads(line).get("response", "")
+                    if chunk:
+                        started = True
+                        yield chunk
+            logger.debug("Text streamed with model: %s", model)
+            return
+        except Exception as e:
+            logger.warning("Failed to stream with %s: %s", model, e)
+            # Part of the answer already reached the client; don't mix in another model
+            if started:
+                raise
+
+def correction_cache_key(text: str, preferred_model: Optional[str]) -> str:
+    """Key corrections by the requested model and the input text."""
+    return hashlib.sha256(f"{preferred_model or ''}\n{text}".encode("utf-8")).hexdigest()
+
+async def process_text_with_ollama(text: str, preferred_model: str = None) -> str:
+    """Correct German text, reusing the result for text that was corrected before."""
+    if len(text.strip()) < MIN_CORRECTION_CHARS:
+        return text
+
+    key = correction_cache_key(text, preferred_model)
+    cached = correction_cache.get(key)
+    if cached is not None:
+        return cached
+
+    corrected_text = await correct_with_ollama(text, preferred_model)
+    if corrected_text is None:
+        logger.warning("All correction models failed, returning original text")
+        return text
+    correction_cache[key] = corrected_text
+    return corrected_text
 
 @app.get("/health")
 async def health():
@@ -223,26 +549,16 @@ async def health():
     # Check Whisper availability
     whisper_status = "available" if whisper_model else "unavailable"
     
-    # Check Ollama availability and German models
+    # Check Ollama availability and German models (probe result is briefly cached)
     ollama_status = "unavailable"
     text_processing_available = False
-    available_german_models = []
+    german_models = []
     
-    try:
-        ollama_response = requests.get(f"{OLLAMA_URL}/api/tags", timeout=5)
-        if ollama_response.status_code == 200:
-            models_data = ollama_response.json().get("models", [])
-            if models_data:
-                ollama_status = "available"
-                text_processing_available = True
-                
-                # Check which German models are available
-                german_models = GERMAN_CORRECTION_MODELS
-                model_names = [model["name"] for model in models_data]
-                available_german_models = [m for m in german_models if m in model_names]
-                
-    except Exception as e:
-        print(f"Health check failed: {e}")
+    await refresh_available_models()
+    if ollama_tags_cache["models"]:
+        ollama_status = "available"
+        text_processing_available = True
+        german_models = available_german_models
     
     return {
         "status": "ok", 
@@ -250,8 +566,8 @@ async def health():
         "whisper": whisper_status,
         "ollama": ollama_status,
         "text_processing_available": text_processing_available,
-        "available_german_models": available_german_models,
-        "whisper_device": "cuda" if torch.cuda.is_available() else "cpu"
+        "available_german_models": german_models,
+        "whisper_device": "cuda" if ctranslate2.get_cuda_device_count() > 0 else "cpu"
     }
 
 @app.post("/transcribe", response_model=ProcessResponse)
@@ -265,73 +581,59 @@ async def transcribe_and_process(
 ):
     """Transcribe audio file and process the text with selectable ASR model."""
     
-    # Create temporary files
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".tmp") as temp_input:
-        shutil.copyfileobj(file.file, temp_input)
-        temp_input_path = temp_input.name
+    # Decode to 16kHz mono samples in-process
+    audio = await asyncio.to_thread(decode_upload, file)
     
-    try:
-        # Convert to WAV if needed
-        if not file.filename.lower().endswith('.wav'):
-            temp_wav_path = temp_input_path + ".wav"
-            if not convert_audio_to_wav(temp_input_path, temp_wav_path):
-                raise HTTPException(status_code=400, detail="Audio conversion failed")
-            audio_path = temp_wav_path
-        else:
-            audio_path = temp_input_path
-        
-        # Transcribe audio with selected ASR model
-        transcript = transcribe_audio_with_model(audio_path, asr_model)
-        
-        # Process with Ollama
-        processed_text = process_text_with_ollama(transcript, correction_model)
-        
-        # Get suggestions from knowledge base
-        suggestions = None
-        corrections_result = kb_client.get_corrections(transcript)
-        if corrections_result:
-            suggestions = corrections_result.get("suggestions", [])
-        
-        # Save to knowledge base
-        kb_client.save_entry(
-            original_text=transcript,
-            processed_text=processed_text,
-            format_type="ollama_correction",
-            metadata={"filename": file.filename}
-        )
-        
-        return ProcessResponse(
-            original_text=transcript,
-            processed_text=processed_text,
-            suggestions=suggestions
-        )
-        
-    finally:
-        # Cleanup temp files
-        Path(temp_input_path).unlink(missing_ok=True)
-        if 'temp_wav_path' in locals():
-            Path(temp_wav_path).unlink(missing_ok=True)
+    # Transcribe audio with selected ASR model
+    transcript = await transcribe_audio_with_model(audio, asr_model)
+    
+    # Nothing recognized: skip correction, suggestions and the knowledge base
+    if len(transcript) < MIN_CORRECTION_CHARS:
+        return ProcessResponse(original_text=transcript, processed_text=transcript)
+    
+    # Process with Ollama
+    processed_text = await process_text_with_ollama(transcript, correction_model)
+    
+    # Get suggestions from knowledge base
+    suggestions = None
+    corrections_result = await kb_client.get_corrections(transcript)
+    if corrections_result:
+        suggestions = corrections_result.get("suggestions", [])
+    
+    # Save to knowledge base without holding up the response
+    run_in_background(kb_client.save_entry(
+        original_text=transcript,
+        processed_text=processed_text,
+        format_type="ollama_correction",
+        metadata={"filename": file.filename}
+    ))
+    
+    return ProcessResponse(
+        original_text=transcript,
+        processed_text=processed_text,
+        suggestions=suggestions
+    )
 
 @app.post("/process-text", response_model=ProcessResponse)
 async def process_text_only(request: ProcessRequest):
     """Process text without transcription."""
     
     # Process with Ollama
-    processed_text = process_text_with_ollama(request.text)
+    processed_text = await process_text_with_ollama(request.text)
     
     # Get suggestions from knowledge base
     suggestions = None
-    corrections_result = kb_client.get_corrections(request.text)
+    corrections_result = await kb_client.get_corrections(request.text)
     if corrections_result:
         suggestions = corrections_result.get("suggestions", [])
     
-    # Save to knowledge base
-    kb_client.save_entry(
+    # Save to knowledge base without holding up the response
+    run_in_background(kb_client.save_entry(
         original_text=request.text,
         processed_text=processed_text,
         format_type=request.format_type,
         metadata={}
-    )
+    ))
     
     return ProcessResponse(
         original_text=request.text,
@@ -339,14 +641,52 @@ async def process_text_only(request: ProcessRequest):
         suggestions=suggestions
     )
 
-def get_audio_duration(audio_path: str) -> float:
-    """Get audio duration in seconds."""
-    try:
-        import librosa
-        duration = librosa.get_duration(filename=audio_path)
-        return round(duration, 2)
-    except:
-        return 0.0
+@app.post("/process-text/stream")
+async def process_text_stream(request: ProcessRequest):
+    """Stream the corrected text to the client as it is generated."""
+    key = correction_cache_key(request.text, request.correction_model)
+
+    async def body():
+        if len(request.text.strip()) < MIN_CORRECTION_CHARS:
+            yield request.text
+            return
+
+        processed_text = correction_cache.get(key)
+        if processed_text is not None:
+            yield processed_text
+        else:
+            parts = []
+            try:
+                async for chunk in stream_text_with_ollama(request.text, request.correction_model):
+                    parts.append(chunk)
+                    yield chunk
+            except Exception as e:
+                # Abort the chunked response so the client sees a truncated body, not
+                # a complete answer; don't cache or store the partial correction
+                logger.error("Correction stream broke off after %d chunks: %s", len(parts), e)
+                raise
+
+            if parts:
+                processed_text = "".join(parts).strip()
+                correction_cache[key] = processed_text
+            else:
+                logger.warning("All correction models failed, returning original text")
+                processed_text = request.text
+                yield processed_text
+
+        # Save to knowledge base once the full correction is known
+        run_in_background(kb_client.save_entry(
+            original_text=request.text,
+            processed_text=processed_text,
+            format_type=request.format_type,
+            metadata={}
+        ))
+
+    return StreamingResponse(body(), media_type="text/plain")
+
+def get_audio_duration(audio: np.ndarray) -> float:
+    """Get audio duration in seconds from decoded samples."""
+    return round(len(audio) / SAMPLE_RATE, 2)
 
 # Add new endpoints for testing
 @app.post("/transcribe-only")
@@ -356,48 +696,31 @@ async def transcribe_only(
 ):
     """Transcribe audio file only, without text processing."""
     
-    # Create temporary files
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".tmp") as temp_input:
-        shutil.copyfileobj(file.file, temp_input)
-        temp_input_path = temp_input.name
-    
     try:
-        # Convert to WAV if needed
-        if not file.filename.lower().endswith('.wav'):
-            temp_wav_path = temp_input_path + ".wav"
-            if not convert_audio_to_wav(temp_input_path, temp_wav_path):
-                raise HTTPException(status_code=400, detail="Audio conversion failed")
-            audio_path = temp_wav_path
-        else:
-            audio_path = temp_input_path
+        # Decode to 16kHz mono samples in-process
+        audio = await asyncio.to_thread(decode_upload, file)
         
         # Transcribe audio with selected ASR model
-        transcript = transcribe_audio_with_model(audio_path, asr_model)
+        transcript = await transcribe_audio_with_model(audio, asr_model)
         
         return {
             "transcription": transcript,
             "asr_model": asr_model,
-            "audio_duration": get_audio_duration(audio_path)
+            "audio_duration": get_audio_duration(audio)
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"Transcription error: {e}")
+        logger.error("Transcription error: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        # Cleanup
-        try:
-            Path(temp_input_path).unlink()
-            if 'temp_wav_path' in locals():
-                Path(temp_wav_path).unlink()
-        except:
-            pass
 
 @app.post("/correct-text")
 async def correct_text_only(request: ProcessRequest):
     """Correct text only, without transcription."""
     try:
         model = getattr(request, 'correction_model', None)
-        processed_text = process_text_with_ollama(request.text, model)
+        processed_text = await process_text_with_ollama(request.text, model)
 
         return {
             "original_text": request.text,
@@ -406,7 +729,7 @@ async def correct_text_only(request: ProcessRequest):
         }
 
     except Exception as e:
-        print(f"Text correction error: {e}")
+        logger.error("Text correction error: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/models/asr")
@@ -414,33 +737,28 @@ async def get_asr_models():
     """Get available ASR models and their status."""
     return {
         "whisper": {
-            "name": "OpenAI Whisper",
+            "name": "Whisper (faster-whisper)",
             "status": "loaded" if whisper_model else "not_loaded",
             "language": "multilingual",
             "size": "~39MB",
-            "optimized": True
+            "optimized": True,
+            "model": whisper_model_name,
+            "device": whisper_device(),
+            "batch_size": WHISPER_BATCH_SIZE,
+            "fast_decoding": WHISPER_FAST_DECODING
         }
     }
 
 @app.get("/models/correction")
 async def get_correction_models():
     """Return correction models: which are installed vs recommended."""
-    installed = []
-    try:
-        r = requests.get(f"{OLLAMA_URL}/api/tags", timeout=5)
-        if r.status_code == 200:
-            names = {m["name"] for m in r.json().get("models", [])}
-            installed = [m for m in GERMAN_CORRECTION_MODELS if m in names]
-    except Exception:
-        pass
+    names = frozenset(await get_ollama_models() or ())
+    installed = [m for m in GERMAN_CORRECTION_MODELS if m in names]
 
+    installed_set = frozenset(installed)
     catalog = [
-        {"id": "gemma3:4b",    "label": "Gemma 3 4B",     "size": "~3.3GB",  "note": "Best German, Google 2025"},
-        {"id": "qwen2.5:7b",   "label": "Qwen 2.5 7B",    "size": "~4.7GB",  "note": "Strong multilingual"},
-        {"id": "mistral:7b",   "label": "Mistral 7B",     "size": "~4.1GB",  "note": "Solid German"},
-        {"id": "llama3.2:3b",  "label": "Llama 3.2 3B",   "size": "~2.0GB",  "note": "Fast fallback"},
+        {**entry, "installed": entry["id"] in installed_set}
+        for entry in CORRECTION_MODEL_CATALOG
     ]
-    for entry in catalog:
-        entry["installed"] = entry["id"] in installed
 
     return {"models": catalog, "installed": installed}
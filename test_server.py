@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""In-process checks for the knowledge base and STT core service internals."""
+
+import importlib.util
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+ROOT = Path(__file__).resolve().parent
+
+def load_app(service_dir, name):
+    """Import a service's app.py as a fresh module."""
+    spec = importlib.util.spec_from_file_location(name, ROOT / service_dir / "app.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def load_knowledge_service():
+    """Import the knowledge service with its data in a new temporary directory."""
+    os.environ["KB_DATA_DIR"] = tempfile.mkdtemp(prefix="kb-test-")
+    return load_app("knowledge-service", "kb_app")
+
+def entry(text, **fields):
+    """Build an entry payload with identical original and processed text."""
+    return {"original_text": text, "processed_text": text, "format_type": "test", **fields}
+
+def test_batch_entries():
+    """Batches are saved with consecutive IDs and capped at MAX_BATCH_ENTRIES."""
+    kb_app = load_knowledge_service()
+    with TestClient(kb_app.app) as client:
+        response = client.post("/entries/batch", json={
+            "entries": [entry(f"Eintrag {i}") for i in range(3)]
+        })
+        assert response.status_code == 200
+        entry_ids = response.json()["entry_ids"]
+        assert entry_ids == list(range(entry_ids[0], entry_ids[0] + 3))
+
+        listed = client.get("/entries").json()["entries"]
+        assert {e["id"]: e["original_text"] for e in listed} == {
+            entry_id: f"Eintrag {i}" for i, entry_id in enumerate(entry_ids)
+        }
+
+        response = client.post("/entries/batch", json={
+            "entries": [entry("x")] * (kb_app.MAX_BATCH_ENTRIES + 1)
+        })
+        assert response.status_code == 422
+
+def test_corrections_lookup():
+    """Learned corrections are served by both the GET and the POST lookup."""
+    kb_app = load_knowledge_service()
+    with TestClient(kb_app.app) as client:
+        entry_id = client.post("/entries", json=entry("der hund läuft")).json()["entry_id"]
+        assert client.put(f"/entries/{entry_id}/edit", json={"edited_text": "der Hund läuft"}).status_code == 200
+
+        by_body = client.post("/corrections", json={"text": "hund"}).json()["suggestions"]
+        by_path = client.get("/corrections/hund").json()["suggestions"]
+        assert by_body == by_path
+        assert [s["suggestion"] for s in by_body] == ["Hund"]
+
+def test_search_cache_invalidation():
+    """A cached search result does not hide an entry saved afterwards."""
+    kb_app = load_knowledge_service()
+    with TestClient(kb_app.app) as client:
+        assert client.post("/search", json={"query": "Zebra"}).json()["results"] == []
+        client.post("/entries", json=entry("Ein Zebra im Zoo"))
+
+        assert len(client.post("/search", json={"query": "Zebra"}).json()["results"]) == 1
+        batch = client.post("/search/batch", json={"queries": ["Zebra", "Giraffe"]}).json()["results"]
+        assert [len(results) for results in batch] == [1, 0]
+
+def test_nested_transaction_rollback():
+    """Failed inner and outer blocks leave neither rows nor cache entries behind."""
+    kb_app = load_knowledge_service()
+    kb = kb_app.KnowledgeBaseService()
+    try:
+        make = lambda text: kb_app.EntryCreate(**entry(text))
+        entry_id = kb.save_entry(make("der hund läuft"))
+
+        # The inner edit fails and is rolled back to its savepoint; the outer save commits
+        learn = kb._learn_corrections
+        kb._learn_corrections = lambda *args: 1 / 0
+        with kb.transaction():
+            kb.save_entry(make("zweiter Eintrag"))
+            assert kb.update_edited_text(entry_id, "der Hund läuft") is False
+        kb._learn_corrections = learn
+        assert kb.get_entry(entry_id)["edited_text"] is None
+        assert len(kb.list_entries()) == 2
+
+        # An outer rollback discards the edit, the new row and their cache updates
+        with pytest.raises(RuntimeError):
+            with kb.transaction():
+                assert kb.update_edited_text(entry_id, "der Hund läuft") is True
+                kb.save_entry(make("dritter Eintrag"))
+                raise RuntimeError("rollback")
+        assert kb.get_entry(entry_id)["edited_text"] is None
+        assert len(kb.list_entries()) == 2
+        assert kb.get_corrections_for_text("hund") == []
+        assert not kb._conn().in_transaction
+    finally:
+        kb.close()
+
+def test_stream_aborts_mid_answer(monkeypatch):
+    """A correction stream that breaks off is aborted, not ended as a complete answer."""
+    pytest.importorskip("faster_whisper")
+    # The app mounts ./static relative to the service directory
+    monkeypatch.chdir(ROOT / "stt-core")
+    stt_app = load_app("stt-core", "stt_app")
+
+    async def broken_stream(text, preferred_model=None):
+        yield "Teil "
+        raise RuntimeError("Ollama disconnected")
+
+    stt_app.stream_text_with_ollama = broken_stream
+    # No lifespan: the stream endpoint needs neither Whisper nor the HTTP clients
+    client = TestClient(stt_app.app)
+    with pytest.raises(RuntimeError):
+        client.post("/process-text/stream", json={"text": "hallo welt"})
+    assert len(stt_app.correction_cache) == 0
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
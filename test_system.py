@@ -1,38 +1,57 @@
 #!/usr/bin/env python3
 """Test script for the containerized STT system."""
 
-import requests
-import json
+import httpx
+import asyncio
+import orjson
 import time
 
-def test_services():
-    """Test the STT containerized services."""
-    
-    print("🧪 Testing STT Containerized System\n")
-    
-    # Test 1: Check service health
-    print("1. Testing service health...")
-    
-    services = [
-        ("Knowledge Base", "http://localhost:8001/health"),
-        ("STT Core", "http://localhost:8000/health")
-    ]
-    
-    for name, url in services:
-        try:
-            response = requests.get(url, timeout=5)
-            if response.status_code == 200:
-                print(f"   ✅ {name}: {response.json()}")
-            else:
-                print(f"   ❌ {name}: HTTP {response.status_code}")
-        except Exception as e:
-            print(f"   ❌ {name}: {e}")
-    
-    print()
-    
-    # Test 2: Knowledge base operations
-    print("2. Testing knowledge base operations...")
-    
+HEALTH_URLS = [
+    ("Knowledge Base", "http://localhost:8001/health"),
+    ("STT Core", "http://localhost:8000/health")
+]
+
+# Upper bound on how long to wait for the services to come up
+STARTUP_TIMEOUT = 30  # seconds
+
+async def wait_for_services(client, timeout=STARTUP_TIMEOUT):
+    """Poll the health endpoints with backoff until all respond; False on timeout."""
+    deadline = time.monotonic() + timeout
+    pending = [url for _, url in HEALTH_URLS]
+    backoff = 0.1
+    while True:
+        responses = await asyncio.gather(
+            *(client.get(url, timeout=2) for url in pending), return_exceptions=True
+        )
+        pending = [
+            url for url, response in zip(pending, responses)
+            if isinstance(response, Exception) or response.status_code != 200
+        ]
+        if not pending:
+            return True
+        if time.monotonic() + backoff > deadline:
+            return False
+        await asyncio.sleep(backoff)
+        backoff = min(backoff * 2, 2.0)
+
+async def check_health(client, name, url):
+    """Check one service's health endpoint."""
+    try:
+        response = await client.get(url, timeout=5)
+        if response.status_code == 200:
+            return [f"   ✅ {name}: {orjson.loads(response.content)}"]
+        return [f"   ❌ {name}: HTTP {response.status_code}"]
+    except Exception as e:
+        return [f"   ❌ {name}: {e}"]
+
+async def run_health_checks(client):
+    """Test 1: Check service health."""
+    results = await asyncio.gather(*(check_health(client, name, url) for name, url in HEALTH_URLS))
+    return [line for lines in results for line in lines]
+
+async def run_knowledge_base_checks(client):
+    """Test 2: Knowledge base operations."""
+    lines = []
     try:
         # Add a test entry
         test_entry = {
@@ -41,72 +60,98 @@ def test_services():
             "format_type": "test_correction",
             "metadata": {"test": True}
         }
-        
-        response = requests.post("http://localhost:8001/entries", json=test_entry, timeout=10)
+
+        response = await client.post("http://localhost:8001/entries", json=test_entry)
         if response.status_code == 200:
-            print("   ✅ Knowledge base entry creation")
+            lines.append("   ✅ Knowledge base entry creation")
         else:
-            print(f"   ❌ Knowledge base entry creation: {response.status_code}")
-        
+            lines.append(f"   ❌ Knowledge base entry creation: {response.status_code}")
+
         # Search test
-        search_response = requests.post("http://localhost:8001/search", 
-                                      json={"query": "test text", "limit": 5}, 
-                                      timeout=10)
+        search_response = await client.post("http://localhost:8001/search",
+                                             json={"query": "test text", "limit": 5})
         if search_response.status_code == 200:
-            results = search_response.json()
-            print(f"   ✅ Knowledge base search: Found {len(results.get('results', []))} results")
+            results = orjson.loads(search_response.content)
+            lines.append(f"   ✅ Knowledge base search: Found {len(results.get('results', []))} results")
         else:
-            print(f"   ❌ Knowledge base search: {search_response.status_code}")
-            
+            lines.append(f"   ❌ Knowledge base search: {search_response.status_code}")
+
     except Exception as e:
-        print(f"   ❌ Knowledge base operations: {e}")
-    
-    print()
-    
-    # Test 3: Text processing
-    print("3. Testing text processing...")
-    
+        lines.append(f"   ❌ Knowledge base operations: {e}")
+    return lines
+
+async def run_text_processing_checks(client):
+    """Test 3: Text processing."""
+    lines = []
     try:
         test_text = {
             "text": "das ist ein test text mit vielen fehlern und schlechte grammatik",
             "format_type": "test_processing"
         }
-        
-        response = requests.post("http://localhost:8000/process-text", 
-                               json=test_text, timeout=30)
+
+        response = await client.post("http://localhost:8000/process-text",
+                                     json=test_text, timeout=30)
         if response.status_code == 200:
-            result = response.json()
-            print("   ✅ Text processing successful")
-            print(f"      Original: {result['original_text']}")
-            print(f"      Processed: {result['processed_text']}")
+            result = orjson.loads(response.content)
+            lines.append("   ✅ Text processing successful")
+            lines.append(f"      Original: {result['original_text']}")
+            lines.append(f"      Processed: {result['processed_text']}")
         else:
-            print(f"   ❌ Text processing: {response.status_code}")
-            
+            lines.append(f"   ❌ Text processing: {response.status_code}")
+
     except Exception as e:
-        print(f"   ❌ Text processing: {e}")
-    
-    print()
-    
-    # Test 4: Service communication
-    print("4. Testing inter-service communication...")
-    
+        lines.append(f"   ❌ Text processing: {e}")
+    return lines
+
+async def run_service_communication_checks(client):
+    """Test 4: Inter-service communication."""
     try:
         # This should trigger STT core to communicate with knowledge base
-        search_response = requests.get("http://localhost:8000/knowledge/search?q=test&limit=5", 
-                                     timeout=10)
+        search_response = await client.get("http://localhost:8000/knowledge/search",
+                                           params={"q": "test", "limit": 5})
         if search_response.status_code == 200:
-            print("   ✅ Inter-service communication working")
-        else:
-            print(f"   ❌ Inter-service communication: {search_response.status_code}")
-            
+            return ["   ✅ Inter-service communication working"]
+        return [f"   ❌ Inter-service communication: {search_response.status_code}"]
+
     except Exception as e:
-        print(f"   ❌ Inter-service communication: {e}")
-    
-    print("\n🎉 Testing complete!")
+        return [f"   ❌ Inter-service communication: {e}"]
+
+async def main():
+    """Run the checks against the STT containerized services."""
+
+    print("🧪 Testing STT Containerized System\n")
+
+    async with httpx.AsyncClient(timeout=10) as client:
+        # Start as soon as the services answer instead of sleeping a fixed time
+        print("⏳ Waiting for services to become ready...")
+        if not await wait_for_services(client):
+            print(f"   ⚠️  Services not ready after {STARTUP_TIMEOUT}s, testing anyway\n")
+
+        # The checks are independent, so run them concurrently and report in order
+        results = await asyncio.gather(
+            run_health_checks(client),
+            run_knowledge_base_checks(client),
+            run_text_processing_checks(client),
+            run_service_communication_checks(client)
+        )
+
+    titles = [
+        "1. Testing service health...",
+        "2. Testing knowledge base operations...",
+        "3. Testing text processing...",
+        "4. Testing inter-service communication...",
+    ]
+    for title, lines in zip(titles, results):
+        print(title)
+        for line in lines:
+            print(line)
+        print()
+
+    print("🎉 Testing complete!")
+
+def test_services():
+    """Test the STT containerized services."""
+    asyncio.run(main())
 
 if __name__ == "__main__":
-    # Wait a bit for services to fully start
-    print("⏳ Waiting 5 seconds for services to stabilize...")
-    time.sleep(5)
-    
     test_services()